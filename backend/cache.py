@@ -0,0 +1,123 @@
+import os
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import orjson
+from pydantic import BaseModel
+from fastapi_cache import FastAPICache
+from fastapi_cache.coder import Coder
+from fastapi_cache.backends import Backend
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+HOLDINGS_CACHE_TTL = int(os.getenv("HOLDINGS_CACHE_TTL", "60"))
+HOLDINGS_PREWARM_INTERVAL = int(os.getenv("HOLDINGS_PREWARM_INTERVAL", "30"))
+# Upper bound on responses held by the in-process fallback cache
+HOLDINGS_CACHE_MAX_ENTRIES = int(os.getenv("HOLDINGS_CACHE_MAX_ENTRIES", "256"))
+# Seconds before an unresponsive Redis counts as a miss instead of stalling the request
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.5"))
+CACHE_PREFIX = "holdings-cache"
+HOLDINGS_NAMESPACE = "holdings"
+
+# Query params that shape the /api/holdings response; anything else (e.g. the
+# injected session factory) must not leak into the cache key.
+HOLDINGS_CACHE_PARAMS = ("broker_id", "symbol", "start_date", "end_date", "limit", "offset", "after", "with_total")
+
+def _orjson_default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError
+
+class ORJsonCoder(Coder):
+    """Serializes cached responses with orjson instead of jsonable_encoder + json."""
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        return orjson.dumps(value, default=_orjson_default)
+
+    @classmethod
+    def decode(cls, value: bytes) -> Any:
+        return orjson.loads(value)
+
+class BoundedMemoryBackend(Backend):
+    """
+    In-process LRU used when Redis is not configured. Keeps at most max_entries
+    responses and drops expired ones on write; fastapi-cache's InMemoryBackend
+    never evicts a key until that same key is requested again.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._store: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._store[key]
+            return None
+        self._store.move_to_end(key)
+        return entry
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        entry = self._get(key)
+        if entry is None:
+            return 0, None
+        return int(entry[0] - time.monotonic()), entry[1]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._get(key)
+        return entry[1] if entry else None
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        now = time.monotonic()
+        for stale in [k for k, (expires_at, _) in self._store.items() if expires_at <= now]:
+            del self._store[stale]
+        self._store[key] = (now + (expire or HOLDINGS_CACHE_TTL), value)
+        self._store.move_to_end(key)
+        while len(self._store) > self.max_entries:
+            self._store.popitem(last=False)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        if namespace:
+            stale = [k for k in self._store if k.startswith(namespace)]
+        elif key and key in self._store:
+            stale = [key]
+        else:
+            stale = []
+        for k in stale:
+            del self._store[k]
+        return len(stale)
+
+def init_cache():
+    """Initialise the response cache. Uses Redis when REDIS_URL is set, else process memory."""
+    if REDIS_URL:
+        from redis import asyncio as aioredis
+        from fastapi_cache.backends.redis import RedisBackend
+
+        redis = aioredis.from_url(REDIS_URL, socket_connect_timeout=REDIS_TIMEOUT, socket_timeout=REDIS_TIMEOUT)
+        backend = RedisBackend(redis)
+    else:
+        logger.info("REDIS_URL not set, using in-memory response cache")
+        backend = BoundedMemoryBackend(HOLDINGS_CACHE_MAX_ENTRIES)
+    # Backend errors are logged and treated as misses, so a Redis outage only costs latency
+    FastAPICache.init(backend, prefix=CACHE_PREFIX, coder=ORJsonCoder)
+
+def holdings_cache_key(namespace: str, params: dict) -> str:
+    """Stable key for a set of holdings query params. Symbol search is case-insensitive."""
+    normalized = {name: params.get(name) for name in HOLDINGS_CACHE_PARAMS}
+    if normalized["symbol"]:
+        normalized["symbol"] = normalized["symbol"].upper()
+    digest = hashlib.md5(repr(sorted(normalized.items())).encode()).hexdigest()
+    return f"{namespace}:{digest}"
+
+def holdings_key_builder(func, namespace: str = "", *, request=None, response=None, args=(), kwargs: Optional[dict] = None) -> str:
+    return holdings_cache_key(namespace, kwargs or {})
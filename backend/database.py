@@ -1,5 +1,4 @@
 import os
-from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
@@ -8,19 +7,38 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Pool sizing: overflow connections count too, so keep (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers
+# below the server's max_connections. Each request can hold up to 3 connections at once.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Statement logging runs synchronously on the event loop; enable only for debugging.
+# For production query visibility use pg_stat_statements instead.
+SQL_ECHO = os.getenv("SQL_ECHO", "").lower() == "true"
+
+# Keep asyncpg's prepared statement cache enabled and reuse pooled connections,
+# so the repeated analytics queries skip connect and parse/plan on warm connections.
+# Requires a session-mode pooler (e.g. Supabase port 5432), not transaction mode.
 engine = create_async_engine(
     DATABASE_URL, 
-    echo=True, 
+    echo=SQL_ECHO, 
     future=True,
-    connect_args={"statement_cache_size": 0},
-    poolclass=NullPool
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    # The API only reads; open every connection read-only at the server
+    connect_args={"server_settings": {"default_transaction_read_only": "on"}},
+    # Room for every statement shape the handlers build (filters x paging modes)
+    query_cache_size=2000
 )
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+# Views (e.g. holdings_daily) are mapped on their own MetaData so Base.metadata.create_all() never creates them as tables
+ViewBase = declarative_base()
+
+def get_session_factory():
+    """Dependency for handlers that open several sessions to run queries concurrently."""
+    return AsyncSessionLocal
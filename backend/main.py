@@ -1,7 +1,12 @@
 import os
 import sys
+import asyncio
+import base64
 import logging
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from datetime import datetime, timedelta, date
+from decimal import Decimal, InvalidOperation
 from typing import List, Optional
 
 # Ensure the root directory is in the python path
@@ -9,11 +14,19 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func, select, and_, desc, text
+from sqlalchemy import func, select, desc, text, tuple_, literal_column, lambda_stmt, type_coerce, Numeric
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
-from backend.database import get_db
-from backend.models import Holding
+from fastapi_cache import FastAPICache
+from fastapi_cache.decorator import cache
+
+from backend.cache import (
+    init_cache, holdings_cache_key, holdings_key_builder,
+    HOLDINGS_CACHE_TTL, HOLDINGS_PREWARM_INTERVAL, HOLDINGS_NAMESPACE
+)
+from backend.database import AsyncSessionLocal, get_session_factory
+from backend.models import Holding, HoldingDaily
 from backend.schemas import (
     HoldingsResponse, Summary, TableItem, Pagination, AggregatedItem
 )
@@ -22,7 +35,47 @@ from backend.schemas import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Holdings Analytics API")
+# Dashboard default: last trading day, first page
+DEFAULT_HOLDINGS_PARAMS = {
+    "broker_id": None, "symbol": None, "start_date": None, "end_date": None,
+    "limit": 100, "offset": 0, "after": None, "with_total": False,
+}
+
+# MAX(date) only moves when a new day is ingested and the rollup refreshed
+LAST_TRADING_DAY_REFRESH = int(os.getenv("LAST_TRADING_DAY_REFRESH", "300"))
+
+async def refresh_last_trading_day():
+    """Keeps app.state.last_trading_day current so default requests skip the MAX(date) query."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                app.state.last_trading_day = await get_last_trading_day(db)
+        except Exception as e:
+            logger.warning(f"Last trading day refresh failed: {str(e)}")
+        await asyncio.sleep(LAST_TRADING_DAY_REFRESH)
+
+async def prewarm_holdings():
+    """Keeps the default dashboard query fresh in the cache so polling clients never miss."""
+    while True:
+        try:
+            result = await get_holdings.__wrapped__(**DEFAULT_HOLDINGS_PARAMS, session_factory=AsyncSessionLocal)
+            key = holdings_cache_key(f"{FastAPICache.get_prefix()}:{HOLDINGS_NAMESPACE}", DEFAULT_HOLDINGS_PARAMS)
+            await FastAPICache.get_backend().set(key, FastAPICache.get_coder().encode(result), HOLDINGS_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Holdings prewarm failed: {str(e)}")
+        await asyncio.sleep(HOLDINGS_PREWARM_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_cache()
+    app.state.last_trading_day = None
+    refresh_task = asyncio.create_task(refresh_last_trading_day())
+    prewarm_task = asyncio.create_task(prewarm_holdings())
+    yield
+    prewarm_task.cancel()
+    refresh_task.cancel()
+
+app = FastAPI(title="Holdings Analytics API", lifespan=lifespan)
 
 # CORS Management
 app.add_middleware(
@@ -33,19 +86,107 @@ app.add_middleware(
 )
 
 async def get_last_trading_day(db: AsyncSession) -> date:
-    """Helper to find the most recent date in the database."""
-    stmt = select(func.max(Holding.date))
+    """
+    Helper to find the most recent date in the database. Read from the rollup so
+    the default day always has aggregates to go with its table rows.
+    """
+    stmt = select(func.max(HoldingDaily.date))
     result = await db.execute(stmt)
     max_date = result.scalar()
     if max_date:
         return max_date.date() if isinstance(max_date, datetime) else max_date
     return date.today()
 
+@lru_cache(maxsize=1024)
+def day_start(d: date) -> datetime:
+    return datetime.combine(d, datetime.min.time())
+
+@lru_cache(maxsize=1024)
+def day_end(d: date) -> datetime:
+    return datetime.combine(d, datetime.max.time())
+
+def encode_cursor(row) -> str:
+    """
+    Encodes the (date, qty, id) sort key of a table row mapping as an opaque cursor.
+    Uses the exact Decimal qty_key, not the float qty, so the seek compares exactly.
+    """
+    raw = f"{row['date'].isoformat()}|{row['qty_key']}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor. Raises a 400 on malformed input."""
+    try:
+        raw_date, raw_qty, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        seek_date, seek_qty, seek_id = datetime.fromisoformat(raw_date), Decimal(raw_qty), int(raw_id)
+        # holdings.date is TIMESTAMP WITHOUT TIME ZONE; holdings.id is a 32-bit INTEGER
+        if seek_date.tzinfo is not None or not seek_qty.is_finite() or not -2**31 <= seek_id < 2**31:
+            raise ValueError(cursor)
+        return seek_date, seek_qty, seek_id
+    except (ValueError, InvalidOperation, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+async def fetch_all(session_factory: sessionmaker, stmt) -> list:
+    """
+    Runs a statement on its own session so several can be awaited concurrently.
+    Rows come back as plain mappings keyed by column label.
+    """
+    async with session_factory() as session:
+        result = await session.execute(stmt)
+        return result.mappings().all()
+
+async def fetch_table(session_factory: sessionmaker, stmt, limit: int) -> tuple:
+    """
+    Fetches the table page in one round trip and builds TableItems from it.
+    stmt is expected to fetch limit + 1 rows; the extra row only signals that
+    another page exists. Returns (items, last kept row, has_more).
+    """
+    table_data = []
+    last_row = None
+    has_more = False
+    async with session_factory() as session:
+        result = await session.execute(stmt)
+        for row in result.mappings():
+            if len(table_data) == limit:
+                has_more = True
+                break
+            last_row = row
+            # Rows come from typed DB columns (qty/amount already floats), so skip per-row validation
+            table_data.append(TableItem.model_construct(
+                date=row["date"].date() if isinstance(row["date"], datetime) else row["date"],
+                broker_id=row["broker_id"],
+                symbol=row["symbol"],
+                qty=row["qty"],
+                amount=row["amount"]
+            ))
+    return table_data, last_row, has_more
+
+# Statements are built with lambda_stmt: SQLAlchemy caches their construction and
+# compiled SQL per code location/shape, and closure values become bound parameters.
+def where_holdings(stmt, start_dt: datetime, end_dt: datetime, broker_id: Optional[int], symbol_pattern: Optional[str]):
+    """Appends the request filters on holdings to a lambda statement."""
+    # qty > 0 is rendered inline so cached generic plans can still match the partial index
+    stmt += lambda s: s.where(Holding.qty > literal_column("0"), Holding.date >= start_dt, Holding.date <= end_dt)
+    if broker_id:
+        stmt += lambda s: s.where(Holding.broker_id == broker_id)
+    if symbol_pattern:
+        stmt += lambda s: s.where(Holding.symbol.ilike(symbol_pattern))
+    return stmt
+
+def where_holdings_daily(stmt, start_dt: datetime, end_dt: datetime, broker_id: Optional[int], symbol_pattern: Optional[str]):
+    """Same predicate against the daily rollup (qty > 0 is baked into the view)."""
+    stmt += lambda s: s.where(HoldingDaily.date >= start_dt, HoldingDaily.date <= end_dt)
+    if broker_id:
+        stmt += lambda s: s.where(HoldingDaily.broker_id == broker_id)
+    if symbol_pattern:
+        stmt += lambda s: s.where(HoldingDaily.symbol.ilike(symbol_pattern))
+    return stmt
+
 @app.get("/")
 async def health_check():
     return {"status": "alive", "service": "Holdings Analytics API", "version": "2.1.0"}
 
 @app.get("/api/holdings", response_model=HoldingsResponse)
+@cache(expire=HOLDINGS_CACHE_TTL, namespace=HOLDINGS_NAMESPACE, key_builder=holdings_key_builder)
 async def get_holdings(
     broker_id: Optional[int] = Query(None),
     symbol: Optional[str] = Query(None),
@@ -53,16 +194,24 @@ async def get_holdings(
     end_date: Optional[date] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    db: AsyncSession = Depends(get_db)
+    after: Optional[str] = Query(None, description="Cursor from a previous page; overrides offset"),
+    with_total: bool = Query(False, description="Also count all matching rows for pagination.total"),
+    session_factory: sessionmaker = Depends(get_session_factory)
 ):
     """
     Main analytics endpoint. Supports single day or date range.
     Defaults to last trading day if no dates provided.
     """
+    seek_key = decode_cursor(after) if after else None
+
     try:
         # 1. Date Logic
         if not start_date and not end_date:
-            last_day = await get_last_trading_day(db)
+            last_day = getattr(app.state, "last_trading_day", None)
+            if last_day is None:
+                # Refresher hasn't completed yet
+                async with session_factory() as db:
+                    last_day = await get_last_trading_day(db)
             start_date = last_day
             end_date = last_day
         elif start_date and not end_date:
@@ -70,92 +219,102 @@ async def get_holdings(
         elif end_date and not start_date:
             start_date = end_date
 
-        start_dt = datetime.combine(start_date, datetime.min.time())
-        end_dt = datetime.combine(end_date, datetime.max.time())
+        start_dt = day_start(start_date)
+        end_dt = day_end(end_date)
 
         # 2. Base Filters
-        filters = [
-            Holding.qty > 0,
-            Holding.date >= start_dt,
-            Holding.date <= end_dt
-        ]
-        if broker_id:
-            filters.append(Holding.broker_id == broker_id)
-        if symbol:
-            filters.append(Holding.symbol.ilike(f"%{symbol}%"))
-
-        # 3. Summary Stats
-        summary_stmt = select(
-            func.sum(Holding.qty).label("total_volume"),
-            func.sum(Holding.amount).label("total_turnover"),
-            func.count(func.distinct(Holding.broker_id)).label("active_brokers")
-        ).where(and_(*filters))
-        
-        summary_res = await db.execute(summary_stmt)
-        summary_row = summary_res.first()
-
-        # 4. Fetch Raw Records (Logs)
-        table_stmt = select(
+        filter_args = (start_dt, end_dt, broker_id, f"%{symbol}%" if symbol else None)
+
+        # 3. Fetch Raw Records (Logs)
+        # One extra row tells whether another page exists without counting the whole set.
+        # With a cursor, seek past the last seen (date, qty, id) instead of OFFSET.
+        page_size = limit + 1
+        table_stmt = lambda_stmt(lambda: select(
+            Holding.id,
             Holding.date,
             Holding.broker_id,
             Holding.symbol,
             Holding.qty,
-            Holding.amount
-        ).where(and_(*filters)).order_by(desc(Holding.date), desc(Holding.qty)).limit(limit).offset(offset)
-
-        table_res = await db.execute(table_stmt)
-        table_data = [
-            TableItem(
-                date=row.date.date() if isinstance(row.date, datetime) else row.date,
-                broker_id=row.broker_id,
-                symbol=row.symbol,
-                qty=float(row.qty or 0),
-                amount=float(row.amount or 0)
+            Holding.amount,
+            # Same column decoded as Decimal, for the pagination cursor
+            type_coerce(Holding.qty, Numeric(asdecimal=True)).label("qty_key")
+        ).order_by(desc(Holding.date), desc(Holding.qty), desc(Holding.id)).limit(page_size))
+        table_stmt = where_holdings(table_stmt, *filter_args)
+        if seek_key:
+            seek_date, seek_qty, seek_id = seek_key
+            table_stmt += lambda s: s.where(
+                tuple_(Holding.date, Holding.qty, Holding.id) < tuple_(seek_date, seek_qty, seek_id)
             )
-            for row in table_res.all()
-        ]
+        else:
+            table_stmt += lambda s: s.offset(offset)
 
-        # 5. Fetch Aggregated Data (Unique Summary)
+        # 4. Fetch Aggregated Data (Unique Summary) from the daily rollup
         # If symbol is searched -> group by broker_id
         # If broker_id is searched -> group by symbol
-        group_col = Holding.broker_id
+        group_col = HoldingDaily.broker_id
         if broker_id and not symbol:
-            group_col = Holding.symbol
+            group_col = HoldingDaily.symbol
         elif symbol:
-            group_col = Holding.broker_id
+            group_col = HoldingDaily.broker_id
 
-        agg_stmt = select(
+        agg_stmt = lambda_stmt(lambda: select(
             group_col.label("entity"),
-            func.sum(Holding.qty).label("total_qty"),
-            func.sum(Holding.amount).label("total_amount"),
-            func.count().label("record_count")
-        ).where(and_(*filters)).group_by(group_col).order_by(desc("total_qty"))
+            func.sum(HoldingDaily.sum_qty).label("total_qty"),
+            func.sum(HoldingDaily.sum_amount).label("total_amount"),
+            func.sum(HoldingDaily.row_count).label("record_count"),
+            # Summary totals ride along as window aggregates over the groups
+            func.sum(func.sum(HoldingDaily.sum_qty)).over().label("total_volume"),
+            func.sum(func.sum(HoldingDaily.sum_amount)).over().label("total_turnover"),
+            func.count().over().label("group_count")
+        ).group_by(group_col).order_by(desc("total_qty")))
+        agg_stmt = where_holdings_daily(agg_stmt, *filter_args)
+
+        # 5. Pagination Count, only on request
+        queries = [
+            fetch_table(session_factory, table_stmt, limit),
+            fetch_all(session_factory, agg_stmt),
+        ]
+        if with_total:
+            count_stmt = where_holdings(lambda_stmt(lambda: select(func.count().label("total_count")).select_from(Holding)), *filter_args)
+            queries.append(fetch_all(session_factory, count_stmt))
+
+        # 6. Run the independent queries concurrently, one session each
+        results = await asyncio.gather(*queries)
+        (table_data, last_row, has_more), agg_rows = results[:2]
+        total_count = results[2][0]["total_count"] if with_total else None
+
+        # Every group is one broker, unless a broker filter pins it to a single one
+        if agg_rows:
+            first = agg_rows[0]
+            total_volume = first["total_volume"]
+            total_turnover = first["total_turnover"]
+            active_brokers = 1 if group_col is HoldingDaily.symbol else first["group_count"]
+        else:
+            total_volume = total_turnover = active_brokers = 0
+
+        next_cursor = encode_cursor(last_row) if has_more else None
 
-        agg_res = await db.execute(agg_stmt)
         aggregated_data = [
-            AggregatedItem(
-                entity_id=str(row.entity),
-                total_qty=float(row.total_qty or 0),
-                total_amount=float(row.total_amount or 0),
-                record_count=int(row.record_count or 0)
+            AggregatedItem.model_construct(
+                entity_id=str(row["entity"]),
+                total_qty=row["total_qty"],
+                total_amount=row["total_amount"],
+                record_count=int(row["record_count"] or 0)
             )
-            for row in agg_res.all()
+            for row in agg_rows
         ]
 
-        # 6. Pagination Count
-        count_stmt = select(func.count()).select_from(Holding).where(and_(*filters))
-        count_res = await db.execute(count_stmt)
-        total_count = count_res.scalar() or 0
-
         return HoldingsResponse(
             summary=Summary(
-                total_volume=float(summary_row.total_volume or 0),
-                total_turnover=float(summary_row.total_turnover or 0),
-                active_entities=int(summary_row.active_brokers or 0)
+                total_volume=float(total_volume or 0),
+                total_turnover=float(total_turnover or 0),
+                active_entities=int(active_brokers or 0)
             ),
             table_data=table_data,
             aggregated_data=aggregated_data,
-            pagination=Pagination(limit=limit, offset=offset, total=total_count)
+            pagination=Pagination(
+                limit=limit, offset=offset, total=total_count, has_more=has_more, next_cursor=next_cursor
+            )
         )
 
     except Exception as e:
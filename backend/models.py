@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Index
-from backend.database import Base
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Index, text
+from backend.database import Base, ViewBase
 
 class Holding(Base):
     __tablename__ = "holdings"
@@ -7,12 +7,37 @@ class Holding(Base):
     id = Column(Integer, primary_key=True, index=True)
     broker_id = Column(Integer, nullable=False)
     symbol = Column(String, nullable=False)
-    qty = Column(Numeric, nullable=False)
-    amount = Column(Numeric, nullable=False)
+    # Exact NUMERIC in the DB, decoded straight to float for the API
+    qty = Column(Numeric(asdecimal=False), nullable=False)
+    amount = Column(Numeric(asdecimal=False), nullable=False)
     date = Column(DateTime, nullable=False)
 
     # Performance: Crucial indexes for the analytics dashboard
     __table_args__ = (
         Index("idx_trade_date", "date"),
         Index("idx_broker_symbol", "broker_id", "symbol"),
+        # Table query: qty > 0 filter, date range, ORDER BY date DESC, qty DESC, id DESC.
+        # Covering + partial so pages come from an index-only scan without a sort.
+        Index(
+            "idx_date_qty_covering",
+            date.desc(), qty.desc(), id.desc(),
+            postgresql_include=["broker_id", "symbol", "amount"],
+            postgresql_where=text("qty > 0"),
+        ),
+        # Substring symbol search (ILIKE '%...%'); needs CREATE EXTENSION pg_trgm
+        Index("idx_symbol_trgm", "symbol", postgresql_using="gin", postgresql_ops={"symbol": "gin_trgm_ops"}),
     )
+
+class HoldingDaily(ViewBase):
+    """
+    Read-only mapping of the holdings_daily materialized view: qty > 0 rows
+    rolled up per (day, broker, symbol). DDL and refresh live in the README.
+    """
+    __tablename__ = "holdings_daily"
+
+    date = Column(DateTime, primary_key=True)
+    broker_id = Column(Integer, primary_key=True)
+    symbol = Column(String, primary_key=True)
+    sum_qty = Column(Numeric(asdecimal=False), nullable=False)
+    sum_amount = Column(Numeric(asdecimal=False), nullable=False)
+    row_count = Column(Integer, nullable=False)
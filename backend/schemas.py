@@ -23,7 +23,9 @@ class AggregatedItem(BaseModel):
 class Pagination(BaseModel):
     limit: int
     offset: int
-    total: int
+    total: Optional[int] = None  # Only counted when with_total is set
+    has_more: bool = False
+    next_cursor: Optional[str] = None
 
 class HoldingsResponse(BaseModel):
     summary: Summary